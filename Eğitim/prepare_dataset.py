@@ -1,4 +1,4 @@
-import json
+import orjson
 
 # Kaynak dosya: HYPRCONTEXT/history.jsonl
 INPUT_FILE = "../history.jsonl"
@@ -6,22 +6,24 @@ INPUT_FILE = "../history.jsonl"
 # Çıkış dosyası: Eğitim/dataset.jsonl
 OUTPUT_FILE = "dataset.jsonl"
 
-entries = []
+INSTRUCTION = "Kullanıcının ekran davranışını analiz et ve üretkenlik yorumunu üret."
 
-with open(INPUT_FILE, "r") as f:
+# Satır satır oku ve hemen yaz (tüm veri bellekte tutulmaz)
+with open(INPUT_FILE, "rb") as f, open(OUTPUT_FILE, "wb") as out:
     for line in f:
-        data = json.loads(line.strip())
-        
+        line = line.strip()
+        if not line:
+            continue
+        data = orjson.loads(line)
+
+        # Satır zaten kaydın JSON hali: tekrar serialize etmeye gerek yok
         item = {
-            "instruction": "Kullanıcının ekran davranışını analiz et ve üretkenlik yorumunu üret.",
-            "input": json.dumps(data, ensure_ascii=False),
+            "instruction": INSTRUCTION,
+            "input": line.decode(),
             "output": data["summary"]
         }
 
-        entries.append(item)
-
-with open(OUTPUT_FILE, "w") as out:
-    for e in entries:
-        out.write(json.dumps(e, ensure_ascii=False) + "\n")
+        out.write(orjson.dumps(item))
+        out.write(b"\n")
 
 print("dataset.jsonl oluşturuldu ✔")
@@ -2,6 +2,7 @@ import torch
 import os
 import sys
 import gc
+import importlib.util
 from packaging import version
 import transformers
 from transformers import AutoModelForCausalLM, GemmaTokenizerFast, BitsAndBytesConfig
@@ -54,45 +55,84 @@ if not os.path.exists("dataset.jsonl"):
 
 dataset = load_dataset("json", data_files="dataset.jsonl")["train"]
 
-def format_chat_template(example):
-    return f"<start_of_turn>user\n{example['instruction']}\n\nVERİ:\n{example['input']}<end_of_turn>\n<start_of_turn>model\n{example['output']}<end_of_turn>"
-
-dataset = dataset.map(lambda x: {"text": format_chat_template(x)}, batched=False)
+NUM_PROC = os.cpu_count() or 1
+
+# Prompt token'ları maskelenir (0), loss sadece model cevabından hesaplanır.
+# Label'ları TRL collator'ı completion_mask'ten vektörel olarak kurar.
+def tokenize_with_mask(batch):
+    prompts = [
+        f"<start_of_turn>user\n{ins}\n\nVERİ:\n{inp}<end_of_turn>\n<start_of_turn>model\n"
+        for ins, inp in zip(batch["instruction"], batch["input"])
+    ]
+    completions = [f"{out}<end_of_turn>" for out in batch["output"]]
+
+    prompt_ids = tokenizer(prompts)["input_ids"]
+    completion_ids = tokenizer(completions, add_special_tokens=False)["input_ids"]
+
+    return {
+        "input_ids": [p + c for p, c in zip(prompt_ids, completion_ids)],
+        "completion_mask": [[0] * len(p) + [1] * len(c) for p, c in zip(prompt_ids, completion_ids)]
+    }
+
+# Tokenize + maskeleme bir kez, paralel (eğitim döngüsü tokenize etmez)
+dataset = dataset.map(
+    tokenize_with_mask,
+    batched=True,
+    batch_size=1000,
+    num_proc=NUM_PROC,
+    remove_columns=dataset.column_names
+)
 
-# === LoRA Config (MİNİMUM AYARLAR) ===
+# === LoRA Config ===
 lora_config = LoraConfig(
-    r=4,
-    lora_alpha=16,
+    r=16,                           # Tensor core'lar K,N >= 16 sever
+    lora_alpha=32,
     lora_dropout=0.05,
     task_type="CAUSAL_LM",
-    target_modules=["q_proj", "v_proj"] 
+    target_modules="all-linear"     # q/k/v/o + gate/up/down
 )
 
+# === Attention ===
+# FlashAttention-2 yoksa (pip install flash-attn --no-build-isolation) SDPA:
+# eager gibi N×N softmax matrisi oluşturmaz, memory-efficient kernel seçer
+if importlib.util.find_spec("flash_attn") is not None:
+    attn_implementation = "flash_attention_2"
+else:
+    attn_implementation = "sdpa"
+
+# Packing sadece FlashAttention-2 ile güvenli: TRL örnek sınırlarını
+# position_ids ile ayırır, SDPA bunu uygulamaz ve birleştirilmiş örnekler
+# birbirine attend eder. SDPA'da packing kapalı (batch_size=1, padding yok).
+use_packing = attn_implementation == "flash_attention_2"
+print(f"⚡ Attention: {attn_implementation} (packing: {'açık' if use_packing else 'kapalı'})")
+
 # === Model Yükleme ===
 print("🧠 Model VRAM'e yükleniyor...")
 model = AutoModelForCausalLM.from_pretrained(
     local_model_path,
     quantization_config=bnb_config,
     device_map="auto",
-    attn_implementation="eager" 
+    torch_dtype=torch.bfloat16,
+    attn_implementation=attn_implementation
 )
 model.config.use_cache = False
 
 # === SFTConfig (ULTRA HAFİF) ===
 training_args = SFTConfig(
     output_dir="ozhan-gemma-2b-lora",
-    dataset_text_field="text",
-    max_length=128,             # <-- 256'dan 128'e düştü (Büyük tasarruf)
-    packing=False,
+    max_length=1024,            # Packing açıksa örnekler 1024 token'lık dizilere birleştirilir
+    packing=use_packing,        # PAD yerine gerçek token (sadece FlashAttention-2 ile)
+    completion_only_loss=True,  # completion_mask: prompt token'ları -100
     per_device_train_batch_size=1,
     gradient_accumulation_steps=4,
-    gradient_checkpointing=True,
-    gradient_checkpointing_kwargs={'use_reentrant': True}, # Bellek tasarrufu için True deniyoruz
+    gradient_checkpointing=False,   # Forward'ı iki kez çalıştırmaz (OOM olursa True yap)
+    gradient_checkpointing_kwargs={'use_reentrant': False},
     num_train_epochs=1,
     max_steps=50,
     learning_rate=2e-4,
     bf16=True,                      # <-- fp16 yerine bf16 (RTX 30 serisi için daha iyi)
-    optim="paged_adamw_8bit",
+    torch_compile=True,             # Inductor ile fused kernel (PyTorch >= 2.4)
+    optim="adamw_bnb_8bit",         # Paging gereksiz (OOM olursa: paged_adamw_8bit)
     logging_steps=5,
     save_strategy="no",
     report_to="none"
@@ -108,6 +148,13 @@ trainer = SFTTrainer(
     processing_class=tokenizer 
 )
 
+# === LoRA ağırlıkları bf16 ===
+# PEFT adapter'ları fp32'ye yükseltir; bf16'da tutunca NF4 dequant + matmul
+# ve LoRA güncellemesi aynı bf16 tensor core yolunda kalır
+for name, param in trainer.model.named_parameters():
+    if "lora_" in name:
+        param.data = param.data.to(torch.bfloat16)
+
 # Son temizlik
 torch.cuda.empty_cache()
 
@@ -5,11 +5,11 @@ Geçmiş aktivitelere dayalı semantik arama ve sohbet.
 
 import logging
 
-import ollama
 from rich.console import Console
 
-from config import MODEL_CHAT
+from config import MODEL_CHAT, OLLAMA_NUM_CTX
 from database import semantic_search
+from ollama_client import get_ollama_client
 
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
@@ -42,9 +42,10 @@ SORU: {question}
 Sadece kayıtlara dayanarak Türkçe ve samimi cevap ver."""
 
         # Streaming yanıt
-        stream = ollama.chat(
+        stream = get_ollama_client().chat(
             model=MODEL_CHAT,
             messages=[{'role': 'user', 'content': prompt}],
+            options={'num_ctx': OLLAMA_NUM_CTX},
             stream=True
         )
         
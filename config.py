@@ -25,6 +25,14 @@ def get_env_int(key: str, default: int = 0) -> int:
         return default
 
 
+def get_env_float(key: str, default: float = 0.0) -> float:
+    """Environment variable'ı float olarak okur."""
+    try:
+        return float(os.getenv(key, str(default)))
+    except ValueError:
+        return default
+
+
 def get_env_list(key: str, default: list = None) -> list:
     """Environment variable'ı virgülle ayrılmış liste olarak okur."""
     if default is None:
@@ -45,11 +53,18 @@ def get_env_path(key: str, default: str = "") -> Path:
 HISTORY_FILE = BASE_DIR / "history.jsonl"
 DB_PATH = BASE_DIR / "hafiza_db"
 REPORTS_DIR = BASE_DIR / "raporlar"
+PLAN_CACHE_DIR = BASE_DIR / "plan_cache"
 
 # === OBSIDIAN ENTEGRASYONU ===
 OBSIDIAN_VAULT = get_env_path("OBSIDIAN_VAULT", "~/SecondBrain")
 OBSIDIAN_DAILY_DIR = get_env_path("OBSIDIAN_DAILY_DIR", "~/SecondBrain/Gunlukler")
 
+# === OLLAMA SUNUCUSU ===
+OLLAMA_HOST = get_env("OLLAMA_HOST", "http://localhost:11434")
+# Tüm modüller aynı bağlam boyutunu gönderir: farklı num_ctx aynı modeli
+# yeniden yükletir (keep_alive ve prompt cache boşa gider)
+OLLAMA_NUM_CTX = get_env_int("OLLAMA_NUM_CTX", 8192)
+
 # === OLLAMA MODELLERİ ===
 MODEL_VISION = get_env("MODEL_VISION", "gemma3")
 MODEL_EMBED = get_env("MODEL_EMBED", "mxbai-embed-large")
@@ -61,8 +76,12 @@ MODEL_REPORT = get_env("MODEL_REPORT", MODEL_VISION)  # Vision ile aynı
 CAPTURE_INTERVAL = get_env_int("CAPTURE_INTERVAL", 20)
 MIN_COOLDOWN = get_env_int("MIN_COOLDOWN", 5)
 
+# === EKRAN GÖRÜNTÜSÜ ===
+SCREENSHOT_QUALITY = get_env_int("SCREENSHOT_QUALITY", 80)  # JPEG kalitesi (0-100)
+SCREENSHOT_SCALE = get_env_float("SCREENSHOT_SCALE", 0.5)   # Çözünürlük ölçeği (1440p -> 720p)
+SCREEN_HASH_THRESHOLD = get_env_int("SCREEN_HASH_THRESHOLD", 5)  # dHash bit farkı altındaysa analiz atlanır (0 = kapalı)
+
 # === HAFIZA ===
-RAM_SIZE = get_env_int("RAM_SIZE", 5)
 MEMORY_DAYS = get_env_int("MEMORY_DAYS", 7)
 
 # === ODAK BEKÇİSİ ===
@@ -80,7 +99,7 @@ COLLECTION_NAME = "hypr_logs"
 
 # === HAVA DURUMU ===
 WEATHER_CITY = get_env("WEATHER_CITY", "Mersin")
-WEATHER_URL = f"wttr.in/{WEATHER_CITY}?format=%c+%t"
+WEATHER_URL = f"https://wttr.in/{WEATHER_CITY}?format=%c+%t"
 
 # === PROFİL ===
 PROFILE_PATH = BASE_DIR / "profile.yaml"
@@ -3,13 +3,14 @@ HyprContext - Günlük Rapor Oluşturucu
 Günün aktivitelerini analiz edip özet rapor üretir.
 """
 
+import sys
+import asyncio
 import logging
 from datetime import datetime
 
-import ollama
-
-from config import OBSIDIAN_DAILY_DIR, MODEL_REPORT, ensure_dirs
-from database import get_logs_by_date
+from config import OBSIDIAN_DAILY_DIR, MODEL_REPORT, OLLAMA_NUM_CTX, ensure_dirs
+from database import get_logs_by_date, semantic_search_many_async, extract_content
+from ollama_client import get_ollama_client
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,12 +18,51 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Geçmiş bağlam: günden kaç aktivite sorgu olarak kullanılsın, her biri için kaç sonuç
+CONTEXT_QUERY_COUNT = 5
+CONTEXT_RESULTS_PER_QUERY = 3
+
 
 def format_logs(logs: list[dict]) -> str:
     """Log listesini okunabilir formata çevirir."""
     return "\n".join([f"- [{log['time']}] {log['content']}" for log in logs])
 
 
+def pick_context_queries(logs: list[dict], count: int = CONTEXT_QUERY_COUNT) -> list[str]:
+    """Günün farklı saatlerine yayılmış aktiviteleri sorgu olarak seçer."""
+    step = max(1, len(logs) // count)
+    return [log["content"] for log in logs[::step][:count] if log["content"]]
+
+
+def fetch_past_context(logs: list[dict], today_str: str) -> str:
+    """Bugünkü aktivitelere benzeyen önceki günlerin kayıtlarını getirir.
+    
+    Sorgular semantic_search_many_async ile eşzamanlı embed edilip tek
+    collection.query çağrısıyla aranır; bugünün kayıtları filtreyle dışlanır.
+    """
+    queries = pick_context_queries(logs)
+    if not queries:
+        return ""
+    
+    results = asyncio.run(semantic_search_many_async(
+        queries,
+        n_results=CONTEXT_RESULTS_PER_QUERY,
+        where={"date": {"$ne": today_str}}
+    ))
+    
+    seen: set[str] = set()
+    lines = []
+    for result in results:
+        for log in result:
+            content = extract_content(log["content"])
+            if content in seen:
+                continue
+            seen.add(content)
+            lines.append(f"- [{log['date']} {log['time']}] {content}")
+    
+    return "\n".join(lines)
+
+
 def generate_report():
     """Günlük rapor oluşturur ve kaydeder."""
     today_str = datetime.now().strftime("%Y-%m-%d")
@@ -38,6 +78,7 @@ def generate_report():
     logger.info(f"{len(logs)} aktivite analiz ediliyor...")
     
     full_text = format_logs(logs)
+    past_context = fetch_past_context(logs, today_str)
     
     # === SYSTEM PROMPT ===
     system_prompt = """Sen bir veri analistisin.
@@ -49,6 +90,9 @@ Dil: Türkçe."""
     user_prompt = f"""LOGLAR:
 {full_text}
 
+GEÇMİŞ BAĞLAM (önceki günlerden benzer aktiviteler):
+{past_context or "Yok"}
+
 ŞABLON:
 # 📅 Günlük Rapor: {today_str}
 
@@ -62,12 +106,15 @@ Dil: Türkçe."""
 (Günü bloklara böl. Sabah, öğle, akşam ne yapıldı.)
 
 ## 💡 Verimlilik Notları
-(Odaklanma seviyesi, çoklu görev durumu.)"""
+(Odaklanma seviyesi, çoklu görev durumu.)
+
+## 🔗 Geçmişle Bağlantı
+(Geçmiş bağlamda devam eden işler varsa kısaca belirt. Yoksa bu bölümü yazma.)"""
 
     print("\n" + "=" * 40)
     
     try:
-        stream = ollama.chat(
+        stream = get_ollama_client().chat(
             model=MODEL_REPORT,
             messages=[
                 {'role': 'system', 'content': system_prompt},
@@ -75,16 +122,21 @@ Dil: Türkçe."""
             ],
             options={
                 'temperature': 0.2,
-                'num_predict': 2048
+                'num_predict': 2048,
+                'num_ctx': OLLAMA_NUM_CTX
             },
             stream=True
         )
         
-        summary = ""
+        # Parçalar listede toplanıp bir kez birleştirilir (+= ile O(n²) kopya yok)
+        parts: list[str] = []
         for chunk in stream:
             part = chunk['message']['content']
-            print(part, end="", flush=True)
-            summary += part
+            sys.stdout.write(part)
+            sys.stdout.flush()
+            parts.append(part)
+        
+        summary = "".join(parts)
         
         print("\n" + "=" * 40)
         
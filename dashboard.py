@@ -3,52 +3,105 @@ HyprContext - Terminal Dashboard
 Rich kütüphanesiyle canlı güncellenen terminal arayüzü.
 """
 
-import json
+import os
 import re
-import time
 import logging
-from collections import deque
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
 
+import orjson
 from rich.console import Console
 from rich.live import Live
 from rich.table import Table
 from rich.panel import Panel
 from rich.layout import Layout
 from rich.text import Text
+from watchfiles import watch
 
 from config import HISTORY_FILE, MAX_DASHBOARD_ROWS
 
 logging.basicConfig(level=logging.WARNING)
 console = Console()
 
+# === ETİKET REGEX ===
+TAG_RE = re.compile(r'\[([^\]]+)\]$')
+
+# === DOSYA İZLEME ===
+WATCH_DEBOUNCE_MS = 250  # Art arda yazmaları tek çizimde birleştir
+
+# === TAIL OKUYUCU ===
+TAIL_BLOCK_SIZE = 64 * 1024
+_tail_cache: dict = {"key": None, "entries": []}
+
+
+def tail_lines(path: Path, n: int) -> list[bytes]:
+    """Dosyanın son n satırını sondan geriye bloklar halinde okuyarak döndürür.
+    
+    Dosya boyutundan bağımsız olarak sadece son satırları içeren bloklar okunur.
+    """
+    if n <= 0:
+        return []
+    
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        buffer = b""
+        
+        while pos > 0 and buffer.count(b"\n") <= n:
+            read_size = min(TAIL_BLOCK_SIZE, pos)
+            pos -= read_size
+            f.seek(pos)
+            buffer = f.read(read_size) + buffer
+    
+    lines = buffer.split(b"\n")
+    if pos > 0:
+        lines = lines[1:]  # İlk parça yarım satır
+    if lines and not lines[-1]:
+        lines.pop()  # Sondaki newline
+    return lines[-n:]
+
 
 def read_last_entries(n: int) -> list[dict]:
-    """Dosyanın son n satırını verimli bir şekilde okur."""
+    """Dosyanın son n satırını verimli bir şekilde okur.
+    
+    Dosya değişmediyse (mtime + boyut aynı) önceki sonuç döndürülür.
+    """
     if not HISTORY_FILE.exists():
         return []
     
-    entries = []
     try:
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            lines = deque(f, maxlen=n)
-            for line in lines:
-                try:
-                    entries.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
+        stat = HISTORY_FILE.stat()
+        cache_key = (stat.st_mtime_ns, stat.st_size, n)
+        if _tail_cache["key"] == cache_key:
+            return _tail_cache["entries"]
+        
+        entries = []
+        for line in tail_lines(HISTORY_FILE, n):
+            try:
+                entries.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                continue
     except Exception as e:
         logging.error(f"Dosya okuma hatası: {e}")
         return []
     
     # En yeniden en eskiye sırala
-    return list(reversed(entries))
+    entries.reverse()
+    _tail_cache["key"] = cache_key
+    _tail_cache["entries"] = entries
+    return entries
 
 
+@lru_cache(maxsize=1024)
 def extract_tags(text: str) -> str:
-    """Metinden etiketleri ayıklar."""
+    """Metinden etiketleri ayıklar.
+    
+    Tablo her yenilendiğinde aynı satırlar tekrar geldiği için cache'lidir.
+    """
     # Metnin sonundaki [Etiket1, Etiket2] kısmını bul
-    match = re.search(r'\[([^\]]+)\]$', text.strip())
+    # "]" ile bitmeyen metinde regex'e hiç girilmez
+    stripped = text.rstrip()
+    match = TAG_RE.search(stripped) if stripped.endswith("]") else None
     
     if match:
         tags_content = match.group(1)
@@ -60,7 +113,7 @@ def extract_tags(text: str) -> str:
     return f"[dim white]{text[:60]}...[/]"
 
 
-def generate_table() -> Table:
+def generate_table(data: list[dict]) -> Table:
     """Rich tablosunu oluşturur."""
     table = Table(
         expand=True,
@@ -72,8 +125,6 @@ def generate_table() -> Table:
     table.add_column("Saat", justify="right", style="bold green", width=10)
     table.add_column("Tespit Edilen Konular", style="bold cyan", ratio=1)
 
-    data = read_last_entries(MAX_DASHBOARD_ROWS)
-    
     if not data:
         table.add_row("---", "[italic grey50]Veri bekleniyor...[/]")
     else:
@@ -98,18 +149,36 @@ def main():
         subtitle=f"[dim]Son {MAX_DASHBOARD_ROWS} Kayıt[/]"
     )
 
-    with Live(console=console, refresh_per_second=1) as live:
-        while True:
-            table = generate_table()
-            
-            layout = Layout()
-            layout.split_column(
-                Layout(header, size=3),
-                Layout(table)
-            )
-            
-            live.update(layout)
-            time.sleep(1)
+    # Layout bir kez kurulur, sadece tablo güncellenir
+    layout = Layout()
+    layout.split_column(
+        Layout(header, size=3),
+        Layout(name="body")
+    )
+    last_data = None
+    history_path = str(HISTORY_FILE)
+
+    def render(live: Live) -> None:
+        nonlocal last_data
+        data = read_last_entries(MAX_DASHBOARD_ROWS)
+        
+        # Dosya değişmediyse aynı liste döner: yeniden çizmeye gerek yok
+        if data is not last_data:
+            layout["body"].update(generate_table(data))
+            live.refresh()
+            last_data = data
+
+    with Live(layout, console=console, auto_refresh=False) as live:
+        render(live)
+        
+        # Polling yerine inotify: sadece history dosyası değişince uyan
+        for _changes in watch(
+            HISTORY_FILE.parent,
+            watch_filter=lambda _change, path: path == history_path,
+            debounce=WATCH_DEBOUNCE_MS,
+            recursive=False
+        ):
+            render(live)
 
 
 if __name__ == "__main__":
@@ -3,21 +3,45 @@ HyprContext - Veritabanı Modülü
 ChromaDB bağlantısı ve ortak veritabanı işlemleri.
 """
 
-import json
+import os
+import time
+import queue
+import asyncio
+import atexit
 import logging
+import threading
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
 import chromadb
-import ollama
+import numpy as np
+import orjson
 
 from config import DB_PATH, HISTORY_FILE, COLLECTION_NAME, MODEL_EMBED
+from ollama_client import get_ollama_client, create_async_ollama_client
 
 logger = logging.getLogger(__name__)
 
+# === ŞEMA ===
+SCHEMA_VERSION = 1        # 1: metadata'da date/time alanları var
+MIGRATION_BATCH_SIZE = 256
+MIGRATION_RETRY_INTERVAL = 60.0   # saniye: başarısız migration tekrar denenmeden önce
+STATS_PAGE_SIZE = 10_000
+
 # === SINGLETON BAĞLANTI ===
 _client: Optional[chromadb.PersistentClient] = None
-_collection: Optional[chromadb.Collection] = None
+
+# JSONL dosyası açık tutulur; silinir/döndürülürse (inode değişir) yeniden açılır
+_history_fp = None
+_history_id: Optional[tuple[int, int]] = None   # (st_dev, st_ino)
+_history_lock = threading.Lock()
+
+# Koleksiyon handle'ı thread başına tutulur (yazıcı thread + ana thread)
+_local = threading.local()
+_migration_lock = threading.Lock()
+_migration_checked = False
+_migration_retry_at = 0.0
 
 
 def get_client() -> chromadb.PersistentClient:
@@ -29,12 +53,62 @@ def get_client() -> chromadb.PersistentClient:
 
 
 def get_collection() -> chromadb.Collection:
-    """Ana koleksiyonu döndürür (singleton)."""
-    global _collection
-    if _collection is None:
-        client = get_client()
-        _collection = client.get_or_create_collection(name=COLLECTION_NAME)
-    return _collection
+    """Ana koleksiyonu döndürür (thread başına bir handle).
+    
+    Eski kayıtlar migrate edilene kadar her erişimde migration denenir.
+    """
+    collection = getattr(_local, "collection", None)
+    if collection is None:
+        collection = get_client().get_or_create_collection(name=COLLECTION_NAME)
+        _local.collection = collection
+    if not _migration_checked:
+        _ensure_migrated(collection)
+    return collection
+
+
+def _ensure_migrated(collection: chromadb.Collection) -> None:
+    """Koleksiyon şeması güncel değilse migration'ı çalıştırır.
+    
+    Şema sürümü koleksiyon metadata'sında saklanır; sonraki açılışlarda
+    sadece bu alan kontrol edilir. Migration başarısız olursa bayrak
+    set edilmez ve MIGRATION_RETRY_INTERVAL sonra tekrar denenir.
+    """
+    global _migration_checked, _migration_retry_at
+    with _migration_lock:
+        if _migration_checked or time.monotonic() < _migration_retry_at:
+            return
+        
+        metadata = collection.metadata or {}
+        if metadata.get("schema_version", 0) >= SCHEMA_VERSION:
+            _migration_checked = True
+            return
+        
+        try:
+            migrated = _migrate_records(collection)
+            collection.modify(metadata={**metadata, "schema_version": SCHEMA_VERSION})
+            _migration_checked = True
+            if migrated:
+                logger.info(f"{migrated} kayıt migrate edildi")
+        except Exception as e:
+            _migration_retry_at = time.monotonic() + MIGRATION_RETRY_INTERVAL
+            logger.error(f"Migration hatası (tekrar denenecek): {e}")
+
+
+def to_vector(embedding: list[float]) -> np.ndarray:
+    """Ollama embedding listesini float32 diziye çevirir (Chroma doğrudan kabul eder)."""
+    return np.asarray(embedding, dtype=np.float32)
+
+
+@lru_cache(maxsize=256)
+def embed_query(query: str, model: str = MODEL_EMBED) -> np.ndarray:
+    """Sorgu embedding'ini döndürür (tekrarlanan sorgular için cache'li).
+    
+    Dönen dizi paylaşıldığı için salt okunurdur.
+    """
+    embed_response = get_ollama_client().embeddings(model=model, prompt=query)
+    vector = to_vector(embed_response["embedding"])
+    vector.setflags(write=False)
+    return vector
 
 
 def generate_unique_id() -> str:
@@ -42,23 +116,63 @@ def generate_unique_id() -> str:
     return datetime.now().strftime("%Y%m%d_%H%M%S_%f")
 
 
+@lru_cache(maxsize=4096)
 def parse_timestamp(timestamp: str) -> tuple[str, str]:
     """Timestamp'ten tarih ve saat çıkarır.
     
     Returns:
         (date: "YYYY-MM-DD", time: "HH:MM")
     """
-    if "T" in timestamp:
-        date_part, time_part = timestamp.split("T")
+    date_part, sep, time_part = timestamp.partition("T")
+    if sep:
         return date_part, time_part[:5]
     return timestamp[:10], "00:00"
 
 
 def save_to_jsonl(data: dict) -> bool:
     """JSONL dosyasına kayıt ekler."""
+    return save_many_to_jsonl([data])
+
+
+def get_history_file():
+    """Açık tutulan JSONL dosyasını döndürür (singleton, append modunda).
+    
+    Her kayıtta open/close yapılmaz; buffering=0 ile her write tek bir
+    syscall olarak diske gider. Dosya silinmiş veya yerine yenisi konmuşsa
+    (log rotasyonu) yazılar eski inode'a kaybolmasın diye yeniden açılır.
+    """
+    global _history_fp, _history_id
+    with _history_lock:
+        if _history_fp is not None and not _history_fp.closed:
+            try:
+                st = os.stat(HISTORY_FILE)
+                current_id = (st.st_dev, st.st_ino)
+            except FileNotFoundError:
+                current_id = None
+            if current_id != _history_id:
+                logger.info("JSONL dosyası değişmiş, yeniden açılıyor")
+                _history_fp.close()
+        
+        if _history_fp is None or _history_fp.closed:
+            _history_fp = open(HISTORY_FILE, "ab", buffering=0)
+            st = os.fstat(_history_fp.fileno())
+            _history_id = (st.st_dev, st.st_ino)
+        return _history_fp
+
+
+def close_history_file() -> None:
+    """Açık JSONL dosyasını kapatır."""
+    with _history_lock:
+        if _history_fp is not None and not _history_fp.closed:
+            _history_fp.close()
+
+
+def save_many_to_jsonl(entries: list[dict]) -> bool:
+    """Birden fazla kaydı tek write çağrısıyla JSONL'e ekler."""
     try:
-        with open(HISTORY_FILE, "a", encoding="utf-8") as f:
-            f.write(json.dumps(data, ensure_ascii=False) + "\n")
+        get_history_file().write(
+            b"".join(orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE) for data in entries)
+        )
         return True
     except Exception as e:
         logger.error(f"JSONL kayıt hatası: {e}")
@@ -70,28 +184,44 @@ def save_to_vectordb(text: str, timestamp: str, doc_id: Optional[str] = None) ->
     
     Metadata'da hem timestamp hem date saklanır (filtreleme için).
     """
+    if doc_id is None:
+        doc_id = generate_unique_id()
+    return save_many_to_vectordb([{"id": doc_id, "timestamp": timestamp, "summary": text}])
+
+
+def save_many_to_vectordb(entries: list[dict]) -> bool:
+    """Birden fazla kaydı tek collection.add çağrısıyla kaydeder.
+    
+    Embedding'ler keep-alive bağlantı üzerinden sırayla üretilir.
+    
+    Args:
+        entries: [{"id": "...", "timestamp": "...", "summary": "..."}, ...]
+    """
     try:
         collection = get_collection()
+        client = get_ollama_client()
         
-        # Embedding oluştur
-        embed_response = ollama.embeddings(model=MODEL_EMBED, prompt=text)
-        
-        # Benzersiz ID
-        if doc_id is None:
-            doc_id = generate_unique_id()
-        
-        # Tarih ve saat ayrıştır
-        date_str, time_str = parse_timestamp(timestamp)
+        documents = [entry["summary"] for entry in entries]
+        embeddings = [
+            to_vector(client.embeddings(model=MODEL_EMBED, prompt=text)["embedding"])
+            for text in documents
+        ]
         
-        collection.add(
-            documents=[text],
-            embeddings=[embed_response["embedding"]],
-            metadatas=[{
-                "timestamp": timestamp,
+        metadatas = []
+        for entry in entries:
+            # Tarih ve saat ayrıştır
+            date_str, time_str = parse_timestamp(entry["timestamp"])
+            metadatas.append({
+                "timestamp": entry["timestamp"],
                 "date": date_str,      # Filtreleme için
                 "time": time_str       # Sıralama için
-            }],
-            ids=[doc_id]
+            })
+        
+        collection.add(
+            documents=documents,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            ids=[entry["id"] for entry in entries]
         )
         return True
     except Exception as e:
@@ -99,25 +229,112 @@ def save_to_vectordb(text: str, timestamp: str, doc_id: Optional[str] = None) ->
         return False
 
 
+# === YAZMA KUYRUĞU (WRITE-BEHIND) ===
+# save_memory çağıranı bekletmez; kayıtlar arka planda toplu yazılır
+WRITE_BATCH_SIZE = 32
+WRITE_FLUSH_INTERVAL = 0.2  # saniye
+SHUTDOWN_FLUSH_TIMEOUT = 10.0  # saniye: kapanışta kuyruğun boşalması için en fazla bekleme
+
+_write_queue: queue.Queue = queue.Queue(maxsize=1024)
+_writer_thread: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def _writer_loop() -> None:
+    """Kuyruktaki kayıtları toplayıp JSONL ve VectorDB'ye toplu yazar."""
+    while True:
+        batch = [_write_queue.get()]
+        deadline = time.monotonic() + WRITE_FLUSH_INTERVAL
+        
+        while len(batch) < WRITE_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_write_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        try:
+            save_many_to_jsonl([{"timestamp": e["timestamp"], "summary": e["summary"]} for e in batch])
+            save_many_to_vectordb(batch)
+        finally:
+            for _ in batch:
+                _write_queue.task_done()
+
+
+def _ensure_writer() -> None:
+    """Yazıcı thread'ini ilk kullanımda başlatır."""
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(target=_writer_loop, name="hafiza-writer", daemon=True)
+            _writer_thread.start()
+            atexit.register(_shutdown)
+
+
+def flush(timeout: Optional[float] = None) -> bool:
+    """Kuyruktaki tüm kayıtlar yazılana kadar bekler.
+    
+    Args:
+        timeout: En fazla bekleme süresi (saniye); None ise süresiz
+    
+    Returns:
+        Kuyruk boşaldıysa True, süre dolduysa False
+    """
+    if _writer_thread is None:
+        return True
+    
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with _write_queue.all_tasks_done:
+        while _write_queue.unfinished_tasks:
+            if deadline is None:
+                _write_queue.all_tasks_done.wait()
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            _write_queue.all_tasks_done.wait(remaining)
+    return True
+
+
+def _shutdown() -> None:
+    """Kapanışta kuyruğu sınırlı süre boşaltır ve JSONL dosyasını kapatır.
+    
+    Ollama yanıt vermiyorsa kapanış SHUTDOWN_FLUSH_TIMEOUT'tan uzun sürmez;
+    yazılamayan kayıtlar loglanır.
+    """
+    if flush(SHUTDOWN_FLUSH_TIMEOUT):
+        close_history_file()
+    else:
+        logger.warning(f"Kapanışta {_write_queue.unfinished_tasks} kayıt yazılamadı")
+
+
 def save_memory(analysis: str, timestamp: Optional[str] = None) -> bool:
-    """Hem JSONL hem de VectorDB'ye kaydeder."""
-    if timestamp is None:
-        timestamp = datetime.now().isoformat()
+    """Kaydı JSONL + VectorDB yazma kuyruğuna ekler.
     
-    entry = {"timestamp": timestamp, "summary": analysis}
+    Yazma arka planda yapılır; kapanışta flush() ile kuyruk boşaltılır.
     
-    jsonl_ok = save_to_jsonl(entry)
-    vector_ok = save_to_vectordb(analysis, timestamp)
+    Returns:
+        Her zaman True: kayıt sadece kuyruğa alınır, yazma hataları
+        arka planda loglanır (sonucu beklemek için flush() kullanılır)
+    """
+    if timestamp is None:
+        timestamp = datetime.now().isoformat()
     
-    return jsonl_ok and vector_ok
+    _ensure_writer()
+    _write_queue.put({"id": generate_unique_id(), "timestamp": timestamp, "summary": analysis})
+    return True
 
 
+@lru_cache(maxsize=2048)
 def extract_content(text: str) -> str:
-    """Etiketleri temizleyerek içeriği çıkarır."""
+    """Etiketleri temizleyerek içeriği çıkarır.
+    
+    Aynı özetler rapor/plan sorgularında tekrar tekrar geldiği için cache'lidir.
+    """
     # Son [...] kısmını kaldır
-    if "[" in text:
-        return text.split("[")[0].strip()
-    return text.strip()
+    return text.partition("[")[0].strip()
 
 
 def get_logs_by_date(target_date: str) -> list[dict]:
@@ -134,7 +351,6 @@ def get_logs_by_date(target_date: str) -> list[dict]:
     try:
         collection = get_collection()
         
-        # Önce where filtresi ile dene (yeni kayıtlar için)
         results = collection.get(
             where={"date": target_date},
             include=["documents", "metadatas"]
@@ -142,21 +358,10 @@ def get_logs_by_date(target_date: str) -> list[dict]:
         
         logs = []
         
-        # Yeni format (date field var)
         if results['metadatas']:
-            for i, meta in enumerate(results['metadatas']):
-                time_str = meta.get('time', meta['timestamp'].split("T")[1][:5])
-                content = extract_content(results['documents'][i])
-                logs.append({"time": time_str, "content": content})
-        
-        # Eski format için fallback (date field yok)
-        if not logs:
-            all_results = collection.get(include=["documents", "metadatas"])
-            for i, meta in enumerate(all_results['metadatas']):
-                if meta['timestamp'].startswith(target_date):
-                    time_str = meta['timestamp'].split("T")[1][:5]
-                    content = extract_content(all_results['documents'][i])
-                    logs.append({"time": time_str, "content": content})
+            for meta, doc in zip(results['metadatas'], results['documents']):
+                time_str = meta.get('time') or meta['timestamp'].split("T", 1)[1][:5]
+                logs.append({"time": time_str, "content": extract_content(doc)})
         
         # Saate göre sırala
         logs.sort(key=lambda x: x["time"])
@@ -188,7 +393,6 @@ def get_logs_last_n_days(days: int = 7, limit: int = 100) -> list[dict]:
             for i in range(days + 1)
         ]
         
-        # Önce where filtresi ile dene (yeni kayıtlar için)
         results = collection.get(
             where={"date": {"$in": valid_dates}},
             include=["documents", "metadatas"]
@@ -196,34 +400,16 @@ def get_logs_last_n_days(days: int = 7, limit: int = 100) -> list[dict]:
         
         logs = []
         
-        # Yeni format
         if results['metadatas']:
-            for i, meta in enumerate(results['metadatas']):
-                date_str = meta.get('date', meta['timestamp'].split("T")[0])
-                time_str = meta.get('time', meta['timestamp'].split("T")[1][:5])
-                content = extract_content(results['documents'][i])
+            for meta, doc in zip(results['metadatas'], results['documents']):
+                date_str = meta.get('date') or meta['timestamp'].split("T", 1)[0]
+                time_str = meta.get('time') or meta['timestamp'].split("T", 1)[1][:5]
                 logs.append({
                     "date": date_str,
                     "time": time_str,
-                    "content": content
+                    "content": extract_content(doc)
                 })
         
-        # Eski format için fallback
-        if not logs:
-            all_results = collection.get(include=["documents", "metadatas"])
-            valid_set = set(valid_dates)
-            
-            for i, meta in enumerate(all_results['metadatas']):
-                ts_day = meta['timestamp'].split("T")[0]
-                if ts_day in valid_set:
-                    time_str = meta['timestamp'].split("T")[1][:5]
-                    content = extract_content(all_results['documents'][i])
-                    logs.append({
-                        "date": ts_day,
-                        "time": time_str,
-                        "content": content
-                    })
-        
         # Tarihe göre sırala ve limitle
         logs.sort(key=lambda x: (x["date"], x["time"]))
         return logs[-limit:]
@@ -233,6 +419,20 @@ def get_logs_last_n_days(days: int = 7, limit: int = 100) -> list[dict]:
         return []
 
 
+def _format_search_results(results: dict, index: int) -> list[dict]:
+    """collection.query sonucundan index'inci sorgunun kayıtlarını çıkarır."""
+    logs = []
+    if results['documents'] and results['metadatas']:
+        for doc, meta in zip(results['documents'][index], results['metadatas'][index]):
+            date_str, time_str = parse_timestamp(meta['timestamp'])
+            logs.append({
+                "date": date_str,
+                "time": time_str,
+                "content": doc
+            })
+    return logs
+
+
 def semantic_search(query: str, n_results: int = 10) -> list[dict]:
     """Semantik arama yapar.
     
@@ -246,78 +446,108 @@ def semantic_search(query: str, n_results: int = 10) -> list[dict]:
     try:
         collection = get_collection()
         
-        # Query embedding
-        embed_response = ollama.embeddings(model=MODEL_EMBED, prompt=query)
-        
+        # Query embedding (cache'li)
         results = collection.query(
-            query_embeddings=[embed_response["embedding"]],
+            query_embeddings=[embed_query(query)],
             n_results=n_results
         )
         
-        logs = []
-        if results['documents'] and results['metadatas']:
-            for i, doc in enumerate(results['documents'][0]):
-                meta = results['metadatas'][0][i]
-                date_str, time_str = parse_timestamp(meta['timestamp'])
-                logs.append({
-                    "date": date_str,
-                    "time": time_str,
-                    "content": doc
-                })
-        
-        return logs
+        return _format_search_results(results, 0)
         
     except Exception as e:
         logger.error(f"Semantik arama hatası: {e}")
         return []
 
 
-def migrate_old_records() -> int:
-    """Eski kayıtlara date/time metadata ekler.
+async def semantic_search_many_async(
+    queries: list[str],
+    n_results: int = 10,
+    where: Optional[dict] = None
+) -> list[list[dict]]:
+    """Birden fazla sorguyu tek seferde arar.
+    
+    Embedding'ler AsyncClient ile eşzamanlı üretilir, ardından tüm sorgular
+    tek bir collection.query çağrısıyla aranır.
+    
+    Args:
+        queries: Arama sorguları
+        n_results: Sorgu başına kaç sonuç dönsün
+        where: Opsiyonel metadata filtresi (örn. {"date": {"$ne": "YYYY-MM-DD"}})
     
     Returns:
-        Güncellenen kayıt sayısı
+        Her sorgu için semantic_search ile aynı formatta sonuç listesi
     """
+    if not queries:
+        return []
+    
     try:
-        collection = get_collection()
-        results = collection.get(include=["documents", "metadatas", "embeddings"])
+        async with create_async_ollama_client() as client:
+            responses = await asyncio.gather(*(
+                client.embeddings(model=MODEL_EMBED, prompt=query) for query in queries
+            ))
         
-        if not results['ids']:
-            logger.info("Migrate edilecek kayıt yok")
-            return 0
+        results = get_collection().query(
+            query_embeddings=[to_vector(response["embedding"]) for response in responses],
+            n_results=n_results,
+            where=where
+        )
         
-        migrated = 0
+        return [_format_search_results(results, i) for i in range(len(queries))]
         
-        for i, meta in enumerate(results['metadatas']):
+    except Exception as e:
+        logger.error(f"Semantik arama hatası: {e}")
+        return [[] for _ in queries]
+
+
+def _migrate_records(collection: chromadb.Collection) -> int:
+    """date/time alanı olmayan kayıtları sayfa sayfa günceller.
+    
+    Sadece metadata okunur ve güncellenir; embedding ve dokümanlar
+    veritabanında kalır. Bellek kullanımı sayfa boyutuyla sınırlıdır.
+    
+    Returns:
+        Güncellenen kayıt sayısı
+    """
+    migrated = 0
+    
+    # update kayıt sayısını/sırasını değiştirmez, offset ile sayfalama güvenli
+    for offset in range(0, collection.count(), MIGRATION_BATCH_SIZE):
+        page = collection.get(include=["metadatas"], limit=MIGRATION_BATCH_SIZE, offset=offset)
+        
+        pending_ids = []
+        pending_metas = []
+        for doc_id, meta in zip(page['ids'], page['metadatas']):
             # Zaten date field varsa atla
             if 'date' in meta:
                 continue
             
             # Tarih ve saat çıkar
             date_str, time_str = parse_timestamp(meta['timestamp'])
-            
-            # Yeni metadata
-            new_meta = {
+            pending_ids.append(doc_id)
+            pending_metas.append({
                 "timestamp": meta['timestamp'],
                 "date": date_str,
                 "time": time_str
-            }
-            
-            # Güncelle (ChromaDB'de update = delete + add)
-            doc_id = results['ids'][i]
-            document = results['documents'][i]
-            embedding = results['embeddings'][i]
-            
-            collection.delete(ids=[doc_id])
-            collection.add(
-                ids=[doc_id],
-                documents=[document],
-                embeddings=[embedding],
-                metadatas=[new_meta]
-            )
-            
-            migrated += 1
+            })
         
+        if pending_ids:
+            collection.update(ids=pending_ids, metadatas=pending_metas)
+            migrated += len(pending_ids)
+    
+    return migrated
+
+
+def migrate_old_records() -> int:
+    """Eski kayıtlara date/time metadata ekler.
+    
+    get_collection() ilk açılışta bunu otomatik yapar; elle çağırmak
+    sadece zorla yeniden kontrol etmek için gerekir.
+    
+    Returns:
+        Güncellenen kayıt sayısı
+    """
+    try:
+        migrated = _migrate_records(get_collection())
         logger.info(f"{migrated} kayıt migrate edildi")
         return migrated
         
@@ -327,26 +557,40 @@ def migrate_old_records() -> int:
 
 
 def get_stats() -> dict:
-    """Veritabanı istatistiklerini döndürür."""
+    """Veritabanı istatistiklerini döndürür.
+    
+    Metadata sayfa sayfa okunur; bellek kullanımı toplam kayıt sayısından
+    bağımsızdır.
+    """
     try:
         collection = get_collection()
         count = collection.count()
         
-        # En eski ve en yeni kayıt
-        results = collection.get(include=["metadatas"])
+        if count == 0:
+            return {"total_records": 0, "oldest": None, "newest": None, "has_date_field": False}
         
-        if results['metadatas']:
-            timestamps = [m['timestamp'] for m in results['metadatas']]
-            timestamps.sort()
-            
-            return {
-                "total_records": count,
-                "oldest": timestamps[0] if timestamps else None,
-                "newest": timestamps[-1] if timestamps else None,
-                "has_date_field": any('date' in m for m in results['metadatas'])
-            }
-        
-        return {"total_records": 0, "oldest": None, "newest": None, "has_date_field": False}
+        # En eski ve en yeni kayıt (çalışan min/max)
+        oldest = None
+        newest = None
+        has_date_field = False
+        
+        for offset in range(0, count, STATS_PAGE_SIZE):
+            page = collection.get(include=["metadatas"], limit=STATS_PAGE_SIZE, offset=offset)
+            for meta in page['metadatas']:
+                timestamp = meta['timestamp']
+                if oldest is None or timestamp < oldest:
+                    oldest = timestamp
+                if newest is None or timestamp > newest:
+                    newest = timestamp
+                if not has_date_field and 'date' in meta:
+                    has_date_field = True
+        
+        return {
+            "total_records": count,
+            "oldest": oldest,
+            "newest": newest,
+            "has_date_field": has_date_field
+        }
         
     except Exception as e:
         logger.error(f"Stats hatası: {e}")
@@ -3,23 +3,27 @@ HyprContext - Ana İzleme Servisi
 Ekran görüntüsü alır, AI ile analiz eder, hafızaya kaydeder.
 """
 
-import os
 import re
+import asyncio
 import time
 import subprocess
 import logging
 from datetime import datetime
-from collections import deque
+from functools import lru_cache
+from io import BytesIO
 
-import ollama
+import ahocorasick
+from PIL import Image
 
 from config import (
-    CAPTURE_INTERVAL, MIN_COOLDOWN, RAM_SIZE,
+    CAPTURE_INTERVAL, MIN_COOLDOWN,
     YASAKLI_KELIMELER, DISTRACTION_THRESHOLD,
-    MODEL_VISION
+    MODEL_VISION, OLLAMA_NUM_CTX, SCREENSHOT_QUALITY, SCREENSHOT_SCALE,
+    SCREEN_HASH_THRESHOLD
 )
 from database import save_memory
-from window_utils import get_active_window_info, get_all_workspaces_info
+from ollama_client import get_ollama_client, create_async_ollama_client
+from window_utils import get_active_window_info
 
 # === LOGGING ===
 logging.basicConfig(
@@ -28,20 +32,105 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# === KISA SÜRELİ HAFIZA ===
-short_term_memory: deque = deque(maxlen=RAM_SIZE)
-
 # === ODAK BEKÇİSİ ===
 distraction_count = 0
 
+# === ETİKET REGEX'LERİ ===
+TAG_SUFFIX_RE = re.compile(r'\[([^\]]+)\]\s*$')         # Sondaki [Etiket1, Etiket2]
+TAG_COMMA_RE = re.compile(r',\s*')                       # Etiketler arası virgül
+
+# === ÇIKTI TEMİZLEME REGEX'LERİ ===
+# İngilizce giriş cümleleri: sırayla uygulanır ("Okay, Here's..." gibi zincirler için)
+ENGLISH_PREFIX_RES = tuple(
+    re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    for pattern in (
+        r"^Okay[,.]?\s*",
+        r"^Here'?s?\s*(the|an|my)?\s*(analysis|output)?[:.]*\s*",
+        r"^Let'?s\s+analyze[:.]*\s*",
+        r"^Based on\s+.*?[,:]\s*",
+        r"^Looking at\s+.*?[,:]\s*",
+        r"^\*\*Analysis:?\*\*\s*",
+        r"^\*\*Output:?\*\*\s*",
+        r"^##?\s*(Analysis|Output|Summary)[:.]*\s*",
+    )
+)
+BULLET_RE = re.compile(r'^[-*•]\s*')                      # Markdown bullet
+BOLD_RE = re.compile(r'\*\*([^*]+)\*\*')                  # **bold**
+TURKISH_CHARS = frozenset('çğıöşüÇĞİÖŞÜ')
+# Zaten temiz tek satır: İngilizce giriş, bullet veya başlık ile başlamıyor, [etiket] ile bitiyor
+WELL_FORMED_RE = re.compile(
+    r"(?!okay|here|let|based on|looking at|[-*•#])[^\n]*\[[^\]\n]+\]\s*$",
+    re.IGNORECASE
+)
+
+# === OTOMATİK ETİKETLER ===
+# Uygulama/Araç etiketleri
+APP_TAGS = {
+    "vscode": "VSCode", "vs code": "VSCode", "code": "VSCode",
+    "terminal": "Terminal", "kitty": "Terminal", "konsole": "Terminal",
+    "chrome": "Chrome", "firefox": "Firefox", "zen": "Tarayıcı",
+    "obsidian": "Obsidian", "notion": "Notion",
+    "youtube": "YouTube", "spotify": "Spotify", "netflix": "Netflix",
+    "discord": "Discord", "slack": "Slack", "telegram": "Telegram",
+    "cursor": "Cursor",
+}
+
+# Aktivite etiketleri (sıra korunur)
+ACTIVITY_TAGS = [
+    ("Python", ("python", ".py", "def ", "import ")),
+    ("JavaScript", ("javascript", ".js", "react", "node")),
+    ("Git", ("git", "commit", "push", "pull")),
+    ("Video", ("video", "izle", "oynat")),
+    ("Araştırma", ("ara", "search", "google")),
+    ("Geliştirme", ("kod", "fonksiyon", "class", "düzenl")),
+    ("Dokümantasyon", ("dokümantasyon", "docs", "readme")),
+    ("Kurulum", ("pip", "npm", "install", "kur")),
+]
+
+
+def build_tag_automaton() -> ahocorasick.Automaton:
+    """Tüm etiket anahtar kelimelerinden tek bir Aho-Corasick otomatı kurar.
+    
+    Metin tek geçişte taranır; her anahtar kelime için ayrı substring
+    araması yapılmaz.
+    """
+    automaton = ahocorasick.Automaton()
+    keywords = list(APP_TAGS)
+    for _, group in ACTIVITY_TAGS:
+        keywords.extend(group)
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+
+TAG_AUTOMATON = build_tag_automaton()
+
+
+def build_banned_automaton() -> ahocorasick.Automaton | None:
+    """YASAKLI_KELIMELER listesinden otomat kurar; liste boşsa None döner.
+    
+    Özet küçük harfle taranır, bu yüzden anahtar kelimeler de küçültülür
+    (.env'de "YouTube" yazılsa bile eşleşir).
+    """
+    keywords = [keyword.lower() for keyword in YASAKLI_KELIMELER if keyword]
+    if not keywords:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+
+BANNED_AUTOMATON = build_banned_automaton()
+
 # === PROMPT ŞABLONLARI ===
+# Sabit talimatlar system prompt'ta: her istekte aynı önek olduğu için
+# Ollama KV cache'i yeniden kullanır, sadece değişen kısım işlenir.
 SYSTEM_PROMPT = """Sen bir ekran görüntüsü analistisin. Türkçe yaz.
 FORMAT: Tek cümle özet + [Etiket1, Etiket2, Etiket3]
-ETİKET ZORUNLU: Her cevabın sonunda mutlaka köşeli parantez içinde 2-4 etiket olmalı."""
-
-USER_PROMPT_TEMPLATE = """EKRANI ANALİZ ET.
-
-Aktif: {active_win}
+ETİKET ZORUNLU: Her cevabın sonunda mutlaka köşeli parantez içinde 2-4 etiket olmalı.
 
 FORMAT KURALI:
 Cevabın MUTLAKA şu formatta olmalı: "Açıklama cümlesi. [Etiket1, Etiket2]"
@@ -61,31 +150,35 @@ ETİKET ÖRNEKLERİ:
 YASAK:
 ❌ Sadece uygulama listesi yapma
 ❌ "Genel" etiketi kullanma
-❌ Etiket koymayı unutma
+❌ Etiket koymayı unutma"""
+
+USER_PROMPT_TEMPLATE = """EKRANI ANALİZ ET.
+
+Aktif: {active_win}
 
 ŞİMDİ EKRANA BAK VE YAZ:"""
 
+# Şablonda tek değişken var: sabit baş/son kısımlar bir kez ayrılır
+USER_PROMPT_HEAD, _, USER_PROMPT_TAIL = USER_PROMPT_TEMPLATE.partition("{active_win}")
 
-def take_screenshot() -> str | None:
-    """Ekran görüntüsü alır, dosya yolunu döndürür."""
-    temp_path = "/tmp/hypr_context_snap.png"
-    
-    if os.path.exists(temp_path):
-        try:
-            os.remove(temp_path)
-        except OSError as e:
-            logger.warning(f"Eski screenshot silinemedi: {e}")
+
+def take_screenshot() -> bytes | None:
+    """Ekran görüntüsü alır, JPEG baytlarını döndürür.
     
+    grim çıktıyı stdout'a yazar; geçici dosya oluşturulmaz.
+    """
     try:
-        subprocess.run(
-            ["grim", temp_path],
+        result = subprocess.run(
+            # grim libjpeg-turbo ile JPEG kodlar (PNG/zlib'den çok daha hızlı ve küçük)
+            # Küçültme de grim içinde yapılır; vision modeli zaten ~896px'e indirger
+            [
+                "grim", "-t", "jpeg", "-q", str(SCREENSHOT_QUALITY),
+                "-s", str(SCREENSHOT_SCALE), "-"
+            ],
             check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
+            capture_output=True
         )
-        if os.path.exists(temp_path):
-            return temp_path
-        return None
+        return result.stdout or None
     except subprocess.CalledProcessError as e:
         logger.error(f"Screenshot hatası: {e}")
         return None
@@ -94,13 +187,41 @@ def take_screenshot() -> str | None:
         return None
 
 
+def screen_hash(image: bytes) -> int | None:
+    """Ekran görüntüsünün 64 bitlik fark hash'ini (dHash) hesaplar.
+    
+    Görüntü 9x8 griye küçültülür; her bit yan yana iki pikselin parlaklık
+    karşılaştırmasıdır. Benzer ekranların hash'leri birkaç bit farklıdır.
+    """
+    try:
+        with Image.open(BytesIO(image)) as img:
+            # JPEG'i kodlama sırasında küçült: tam çözünürlükte açmaya gerek yok
+            img.draft("L", (72, 64))
+            pixels = img.convert("L").resize((9, 8), Image.BOX).tobytes()
+    except OSError as e:
+        logger.debug(f"Hash hesaplanamadı: {e}")
+        return None
+    
+    value = 0
+    for row in range(0, 72, 9):
+        for col in range(row, row + 8):
+            value = (value << 1) | (pixels[col] < pixels[col + 1])
+    return value
+
+
 def check_distraction(analysis: str) -> None:
     """Yasaklı kelimeleri kontrol eder ve bildirim atar."""
     global distraction_count
     
     summary_lower = analysis.lower()
     
-    if any(keyword in summary_lower for keyword in YASAKLI_KELIMELER):
+    # Tek geçişte tara: ilk eşleşme yeterli
+    is_distracted = (
+        BANNED_AUTOMATON is not None
+        and next(BANNED_AUTOMATON.iter(summary_lower), None) is not None
+    )
+    
+    if is_distracted:
         distraction_count += 1
         logger.warning(f"Dikkat dağınıklığı tespit edildi ({distraction_count}/{DISTRACTION_THRESHOLD})")
     else:
@@ -130,20 +251,13 @@ def clean_output(raw_text: str) -> str:
     """
     text = raw_text.strip()
     
-    # İngilizce giriş cümlelerini temizle
-    english_patterns = [
-        r"^Okay[,.]?\s*",
-        r"^Here'?s?\s*(the|an|my)?\s*(analysis|output)?[:.]*\s*",
-        r"^Let'?s\s+analyze[:.]*\s*",
-        r"^Based on\s+.*?[,:]\s*",
-        r"^Looking at\s+.*?[,:]\s*",
-        r"^\*\*Analysis:?\*\*\s*",
-        r"^\*\*Output:?\*\*\s*",
-        r"^##?\s*(Analysis|Output|Summary)[:.]*\s*",
-    ]
+    # Hızlı yol: model çoğunlukla istenen formatta tek satır döndürür
+    if "**" not in text and WELL_FORMED_RE.match(text):
+        return format_tags(text)
     
-    for pattern in english_patterns:
-        text = re.sub(pattern, "", text, flags=re.IGNORECASE | re.MULTILINE)
+    # İngilizce giriş cümlelerini temizle
+    for pattern in ENGLISH_PREFIX_RES:
+        text = pattern.sub("", text)
     
     # Satırları ayır ve temizle
     lines = text.strip().split('\n')
@@ -155,13 +269,12 @@ def clean_output(raw_text: str) -> str:
         if not line or line in ['-', '*', '•', '—']:
             continue
         # Markdown bullet'larını temizle
-        line = re.sub(r'^[-*•]\s*', '', line)
+        line = BULLET_RE.sub('', line)
         # **bold** işaretlerini temizle
-        line = re.sub(r'\*\*([^*]+)\*\*', r'\1', line)
+        line = BOLD_RE.sub(r'\1', line)
         cleaned_lines.append(line)
     
     # Türkçe içeren satırı bul (öncelik)
-    turkish_chars = set('çğıöşüÇĞİÖŞÜ')
     result = None
     
     for line in cleaned_lines:
@@ -173,7 +286,7 @@ def clean_output(raw_text: str) -> str:
     # Etiket yoksa ilk Türkçe satırı al
     if not result:
         for line in cleaned_lines:
-            if any(c in line for c in turkish_chars):
+            if not TURKISH_CHARS.isdisjoint(line):
                 result = line
                 break
     
@@ -184,14 +297,22 @@ def clean_output(raw_text: str) -> str:
     if not result:
         return raw_text.strip()
     
+    return format_tags(result)
+
+
+def format_tags(result: str) -> str:
+    """Satırın sonundaki etiketleri [Etiket1, Etiket2] formatına getirir.
+    
+    Etiket yoksa veya sadece "Genel" ise içerikten etiket çıkarılır.
+    """
     # Etiket formatını düzelt: [Etiket1, Etiket2] olmalı
-    tag_match = re.search(r'\[([^\]]+)\]\s*$', result)
+    tag_match = TAG_SUFFIX_RE.search(result)
     
     if tag_match:
         tags = tag_match.group(1)
         summary = result[:tag_match.start()].strip()
         # Virgüllerden sonra boşluk ekle
-        tags = re.sub(r',\s*', ', ', tags)
+        tags = TAG_COMMA_RE.sub(', ', tags)
         
         # "Genel" etiketini akıllı etiketle değiştir
         if tags.strip().lower() == "genel":
@@ -206,88 +327,71 @@ def clean_output(raw_text: str) -> str:
     return result
 
 
-def infer_tags(text: str) -> str:
-    """Metinden otomatik etiket çıkarır."""
-    text_lower = text.lower()
+@lru_cache(maxsize=512)
+def _infer_tags_cached(text_lower: str) -> tuple[str, ...]:
+    """Küçük harfli metnin etiketlerini döndürür (aynı pencere tekrar eder)."""
+    found = {keyword for _, keyword in TAG_AUTOMATON.iter(text_lower)}
     tags = []
     
-    # Uygulama/Araç etiketleri
-    app_tags = {
-        "vscode": "VSCode", "vs code": "VSCode", "code": "VSCode",
-        "terminal": "Terminal", "kitty": "Terminal", "konsole": "Terminal",
-        "chrome": "Chrome", "firefox": "Firefox", "zen": "Tarayıcı",
-        "obsidian": "Obsidian", "notion": "Notion",
-        "youtube": "YouTube", "spotify": "Spotify", "netflix": "Netflix",
-        "discord": "Discord", "slack": "Slack", "telegram": "Telegram",
-        "cursor": "Cursor",
-    }
-    
-    for key, tag in app_tags.items():
-        if key in text_lower and tag not in tags:
+    # Uygulama/Araç etiketleri (sözlük sırası öncelik belirler)
+    for key, tag in APP_TAGS.items():
+        if key in found:
             tags.append(tag)
             break  # Sadece bir uygulama etiketi
     
     # Aktivite etiketleri
-    if any(x in text_lower for x in ["python", ".py", "def ", "import "]):
-        tags.append("Python")
-    if any(x in text_lower for x in ["javascript", ".js", "react", "node"]):
-        tags.append("JavaScript")
-    if any(x in text_lower for x in ["git", "commit", "push", "pull"]):
-        tags.append("Git")
-    if any(x in text_lower for x in ["video", "izle", "oynat"]):
-        tags.append("Video")
-    if any(x in text_lower for x in ["ara", "search", "google"]):
-        tags.append("Araştırma")
-    if any(x in text_lower for x in ["kod", "fonksiyon", "class", "düzenl"]):
-        tags.append("Geliştirme")
-    if any(x in text_lower for x in ["dokümantasyon", "docs", "readme"]):
-        tags.append("Dokümantasyon")
-    if any(x in text_lower for x in ["pip", "npm", "install", "kur"]):
-        tags.append("Kurulum")
+    for tag, keywords in ACTIVITY_TAGS:
+        if not found.isdisjoint(keywords):
+            tags.append(tag)
     
     # En az 2 etiket olsun
     if len(tags) < 2:
         if "Geliştirme" not in tags:
             tags.append("Geliştirme")
     
+    return tuple(tags)
+
+
+def infer_tags(text: str) -> str:
+    """Metinden otomatik etiket çıkarır."""
+    tags = _infer_tags_cached(text.lower())
     return ", ".join(tags[:4]) if tags else "Aktivite"
 
 
-def analyze_image(image_path: str) -> str | None:
+def build_user_prompt(active_win: str) -> str:
+    """Aktif pencere bilgisinden kullanıcı prompt'unu oluşturur.
+    
+    Şablon sadece aktif pencereyi kullanır; arka plan uygulamaları prompt'a
+    girmediği için her döngüde toplanmaz.
+    """
+    return "".join((USER_PROMPT_HEAD, str(active_win), USER_PROMPT_TAIL))
+
+
+def build_chat_request(image: bytes, user_prompt: str) -> dict:
+    """Ollama chat isteğinin parametrelerini döndürür."""
+    return {
+        'model': MODEL_VISION,
+        'messages': [
+            {'role': 'system', 'content': SYSTEM_PROMPT},
+            {'role': 'user', 'content': user_prompt, 'images': [image]}
+        ],
+        'keep_alive': '30m',     # Model ve önek KV cache'i bellekte kalsın
+        'options': {
+            'temperature': 0.1,  # Daha tutarlı çıktı için düşürüldü
+            'num_predict': 150,  # Kısa çıktı zorla
+            'num_ctx': OLLAMA_NUM_CTX  # Ortak bağlam: değişirse model yeniden yüklenir
+        }
+    }
+
+
+def analyze_image(image: bytes, active_win: str) -> str | None:
     """Ekran görüntüsünü AI ile analiz eder."""
     logger.info(f"AI ({MODEL_VISION}) analiz ediyor...")
     start_time = time.time()
     
     try:
-        # Bağlam verilerini topla
-        active_win = get_active_window_info()
-        background_apps = get_all_workspaces_info()
-        
-        # Kısa süreli hafızayı formatla
-        if short_term_memory:
-            history_str = " → ".join(list(short_term_memory)[-3:])
-        else:
-            history_str = "Yeni oturum"
-        
-        # Prompt'u oluştur
-        user_prompt = USER_PROMPT_TEMPLATE.format(
-            active_win=active_win,
-            background_apps=background_apps,
-            history=history_str
-        )
-        
-        response = ollama.chat(
-            model=MODEL_VISION,
-            messages=[
-                {'role': 'system', 'content': SYSTEM_PROMPT},
-                {'role': 'user', 'content': user_prompt, 'images': [image_path]}
-            ],
-            keep_alive='5m',
-            options={
-                'temperature': 0.1,  # Daha tutarlı çıktı için düşürüldü
-                'num_predict': 150   # Kısa çıktı zorla
-            }
-        )
+        user_prompt = build_user_prompt(active_win)
+        response = get_ollama_client().chat(**build_chat_request(image, user_prompt))
         
         elapsed = time.time() - start_time
         raw_content = response['message']['content']
@@ -306,50 +410,124 @@ def analyze_image(image_path: str) -> str | None:
         return None
 
 
-def extract_summary(text: str) -> str:
-    """Etiketleri çıkararak sadece özet kısmını döndürür."""
-    # Son [...] kısmını bul ve çıkar
-    match = re.search(r'^(.*?)\s*\[[^\]]+\]\s*$', text)
-    if match:
-        return match.group(1).strip()
-    return text.strip()
+async def analyze_batch_async(frames: list[tuple[bytes, str]]) -> list[str | None]:
+    """Birden fazla ekran görüntüsünü eşzamanlı analiz eder.
+    
+    İstekler tek bir AsyncClient üzerinden aynı anda gönderilir. Ollama
+    sunucusu OLLAMA_NUM_PARALLEL kadar isteği paralel işler.
+    
+    Args:
+        frames: (görüntü, görüntü alındığındaki aktif pencere) çiftleri
+    
+    Returns:
+        Her görüntü için temizlenmiş analiz (hata olursa None), aynı sırada
+    """
+    logger.info(f"AI ({MODEL_VISION}) {len(frames)} görüntüyü analiz ediyor...")
+    start_time = time.time()
+    
+    async with create_async_ollama_client() as client:
+        async def analyze_one(index: int, image: bytes, active_win: str) -> str | None:
+            try:
+                request = build_chat_request(image, build_user_prompt(active_win))
+                response = await client.chat(**request)
+                return clean_output(response['message']['content'])
+            except Exception as e:
+                logger.error(f"Analiz hatası (#{index}): {e}")
+                return None
+        
+        results = await asyncio.gather(
+            *(analyze_one(i, image, active_win) for i, (image, active_win) in enumerate(frames))
+        )
+    
+    elapsed = time.time() - start_time
+    logger.info(f"Toplu analiz tamamlandı ({elapsed:.2f}s)")
+    
+    return list(results)
 
 
-def main():
-    """Ana döngü."""
-    logger.info("HyprContext başlatıldı")
+def process_analysis(analysis: str) -> None:
+    """Analiz sonucunu kaydeder ve odak kontrolü yapar."""
+    timestamp = datetime.now().isoformat()
+    save_memory(analysis, timestamp)
+    check_distraction(analysis)
+    
+    # Debug için son çıktıyı göster
+    logger.info(f"📝 {analysis}")
+
+
+async def capture_loop(queue: asyncio.Queue) -> None:
+    """Üretici: her CAPTURE_INTERVAL'de ekran görüntüsü ve aktif pencereyi kuyruğa koyar.
+    
+    Zamanlama sabit tiklere göre yapılır, döngü süresi kaymaz. Analiz
+    yetişemezse kuyruktaki eski görüntü yenisiyle değiştirilir.
+    """
+    loop = asyncio.get_running_loop()
+    next_tick = loop.time()
     
     while True:
-        loop_start = time.time()
+        screenshot = await asyncio.to_thread(take_screenshot)
         
-        screenshot_path = take_screenshot()
+        if screenshot:
+            # Pencere bilgisi görüntüyle aynı anda okunur; analiz gecikse de eşleşir
+            active_win = await asyncio.to_thread(get_active_window_info)
+            if queue.full():
+                queue.get_nowait()
+                logger.debug("Analiz yetişemedi, eski görüntü atlandı")
+            queue.put_nowait((screenshot, active_win))
         
-        if screenshot_path:
-            analysis = analyze_image(screenshot_path)
-            
-            if analysis:
-                timestamp = datetime.now().isoformat()
-                save_memory(analysis, timestamp)
-                check_distraction(analysis)
-                
-                # Kısa süreli hafızaya sadece özeti ekle
-                clean_summary = extract_summary(analysis)
-                short_term_memory.append(clean_summary)
-                
-                # Debug için son çıktıyı göster
-                logger.info(f"📝 {analysis}")
-            
-            try:
-                if os.path.exists(screenshot_path):
-                    os.remove(screenshot_path)
-            except OSError:
-                pass
+        next_tick += CAPTURE_INTERVAL
+        now = loop.time()
+        if next_tick - now < MIN_COOLDOWN:
+            # Geride kalındıysa tikleri toplu yakalamaya çalışma
+            next_tick = now + MIN_COOLDOWN
+        logger.debug(f"Bekleniyor: {next_tick - now:.1f}s")
+        await asyncio.sleep(next_tick - now)
+
+
+async def analyze_loop(queue: asyncio.Queue) -> None:
+    """Tüketici: kuyruktaki görüntüleri sırayla analiz eder.
+    
+    Analiz sürerken bir sonraki ekran görüntüsü alınabilir. Kayıt ve bildirim
+    (process_analysis) de thread'de çalışır; bloklansa bile yakalama döngüsü
+    etkilenmez. Aktif pencere aynıysa ve ekran hash'i SCREEN_HASH_THRESHOLD
+    bitten az değiştiyse model çağrılmaz, önceki analiz yeniden kaydedilir.
+    """
+    last_hash: int | None = None
+    last_window: str | None = None
+    last_analysis: str | None = None
+    
+    while True:
+        screenshot, active_win = await queue.get()
+        
+        image_hash = None
+        if SCREEN_HASH_THRESHOLD > 0:
+            image_hash = await asyncio.to_thread(screen_hash, screenshot)
         
-        elapsed = time.time() - loop_start
-        sleep_time = max(MIN_COOLDOWN, CAPTURE_INTERVAL - elapsed)
-        logger.debug(f"Bekleniyor: {sleep_time:.1f}s")
-        time.sleep(sleep_time)
+        if (
+            last_analysis
+            and image_hash is not None
+            and last_hash is not None
+            and active_win == last_window
+            and (image_hash ^ last_hash).bit_count() < SCREEN_HASH_THRESHOLD
+        ):
+            logger.info("Ekran değişmedi, önceki analiz kullanılıyor")
+            await asyncio.to_thread(process_analysis, last_analysis)
+            continue
+        
+        analysis = await asyncio.to_thread(analyze_image, screenshot, active_win)
+        
+        if analysis:
+            last_hash, last_window, last_analysis = image_hash, active_win, analysis
+            await asyncio.to_thread(process_analysis, analysis)
+
+
+async def main():
+    """Ana döngü: yakalama ve analiz eşzamanlı çalışır."""
+    logger.info("HyprContext başlatıldı")
+    
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    await asyncio.gather(capture_loop(queue), analyze_loop(queue))
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
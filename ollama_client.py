@@ -0,0 +1,41 @@
+"""
+HyprContext - Ollama İstemcisi
+Tüm modüllerin paylaştığı, keep-alive bağlantılı tek Ollama client'ı.
+"""
+
+from functools import lru_cache
+
+import httpx
+import ollama
+
+from config import OLLAMA_HOST
+
+# === BAĞLANTI HAVUZU ===
+# Her istekte yeni TCP bağlantısı açmak yerine bağlantılar açık tutulur
+POOL_LIMITS = httpx.Limits(
+    max_keepalive_connections=10,
+    max_connections=20,
+    keepalive_expiry=60.0
+)
+
+# Ollama yanıt vermezse istekler (ve kapanıştaki yazma kuyruğu) sonsuza
+# kadar beklemesin. Okuma süresi stream'de parça başına uygulanır.
+REQUEST_TIMEOUT = httpx.Timeout(120.0, connect=5.0)
+
+@lru_cache(maxsize=4)
+def get_ollama_client(host: str = OLLAMA_HOST) -> ollama.Client:
+    """Host başına tek Ollama client'ı döndürür.
+    
+    Farklı host'lar arasında geçiş yapılsa da her client'ın bağlantı havuzu
+    açık kalır. Dönen client paylaşılır; üzerinde değişiklik yapılmamalı.
+    """
+    return ollama.Client(host=host, limits=POOL_LIMITS, timeout=REQUEST_TIMEOUT)
+
+
+def create_async_ollama_client() -> ollama.AsyncClient:
+    """Eşzamanlı istekler için AsyncClient oluşturur.
+    
+    AsyncClient bağlantıları oluşturulduğu event loop'a bağlıdır; bu yüzden
+    singleton değildir. Bir toplu işlemdeki tüm istekler aynı client'ı paylaşır.
+    """
+    return ollama.AsyncClient(host=OLLAMA_HOST, limits=POOL_LIMITS, timeout=REQUEST_TIMEOUT)
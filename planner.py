@@ -3,20 +3,22 @@ HyprContext - Günlük Plan Oluşturucu
 Kullanıcı profiline ve geçmiş aktivitelere dayalı günlük plan üretir.
 """
 
-import subprocess
+import os
 import sys
+import hashlib
 import logging
-from datetime import datetime
+from datetime import datetime, date
 
+import httpx
 import yaml
-import ollama
 
 from config import (
     PROFILE_PATH, OBSIDIAN_DAILY_DIR, 
-    MEMORY_DAYS, MODEL_PLAN, WEATHER_URL,
+    MEMORY_DAYS, MODEL_PLAN, OLLAMA_NUM_CTX, WEATHER_URL, PLAN_CACHE_DIR,
     ensure_dirs
 )
 from database import get_logs_last_n_days
+from ollama_client import get_ollama_client
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,6 +26,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# === PLAN ÖNBELLEĞİ ===
+PLAN_CACHE_SIZE = 50                 # Diskte tutulacak en fazla plan
+HEADER_MARKER = "# 🎯"               # Planın başladığı satır
+
 
 def load_profile() -> dict | None:
     """Kullanıcı profilini yükler."""
@@ -40,15 +46,11 @@ def load_profile() -> dict | None:
 
 
 def get_weather() -> str:
-    """Hava durumunu çeker."""
+    """Hava durumunu çeker (curl süreci başlatmadan, doğrudan HTTP ile)."""
     try:
-        result = subprocess.run(
-            ["curl", "-s", WEATHER_URL],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        return result.stdout.strip() or "Bilinmiyor"
+        response = httpx.get(WEATHER_URL, timeout=5)
+        response.raise_for_status()
+        return response.text.strip() or "Bilinmiyor"
     except Exception:
         return "Bilinmiyor"
 
@@ -74,6 +76,79 @@ def format_history(logs: list[dict]) -> str:
     return "\n".join(lines)
 
 
+def plan_cache_key(system_prompt: str, user_prompt: str) -> str:
+    """Model ve prompt'lardan önbellek anahtarı üretir."""
+    payload = "\n".join((MODEL_PLAN, system_prompt, user_prompt))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_cached_plan(key: str) -> str | None:
+    """Bugün aynı girdilerle üretilmiş plan varsa döndürür."""
+    path = PLAN_CACHE_DIR / f"{key}.md"
+    try:
+        if date.fromtimestamp(path.stat().st_mtime) != date.today():
+            return None
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def save_cached_plan(key: str, plan: str) -> None:
+    """Planı önbelleğe yazar, en eski dosyaları PLAN_CACHE_SIZE'a kadar siler."""
+    try:
+        PLAN_CACHE_DIR.mkdir(exist_ok=True)
+        path = PLAN_CACHE_DIR / f"{key}.md"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(plan, encoding="utf-8")
+        os.replace(tmp_path, path)
+        
+        cached = sorted(PLAN_CACHE_DIR.glob("*.md"), key=lambda p: p.stat().st_mtime)
+        for old in cached[:-PLAN_CACHE_SIZE]:
+            old.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"Plan önbelleğe yazılamadı: {e}")
+
+
+def stream_plan(system_prompt: str, user_prompt: str) -> str:
+    """Planı modelden akış halinde alır, başlıktan itibaren ekrana yazar."""
+    stream = get_ollama_client().chat(
+        model=MODEL_PLAN,
+        messages=[
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': user_prompt}
+        ],
+        options={
+            'temperature': 0.1,
+            'repeat_penalty': 1.2,
+            'num_predict': 1024,
+            'num_ctx': OLLAMA_NUM_CTX
+        },
+        stream=True
+    )
+    
+    plan = ""
+    header_found = False
+    
+    for chunk in stream:
+        content = chunk['message']['content']
+        plan += content
+        
+        # Canlı filtreleme
+        if not header_found:
+            if HEADER_MARKER in plan:
+                header_found = True
+                clean_start = plan.find(HEADER_MARKER)
+                print(plan[clean_start:], end="", flush=True)
+        else:
+            print(content, end="", flush=True)
+    
+    # Temizlik
+    if HEADER_MARKER in plan:
+        plan = plan[plan.find(HEADER_MARKER):]
+    
+    return plan
+
+
 def generate_daily_plan():
     """Günlük planı oluşturur ve kaydeder."""
     logger.info("Günlük plan oluşturuluyor...")
@@ -135,43 +210,19 @@ KURAL: "{active_course}" konusuna odaklan. Tüm bloklar bu dersle ilgili olsun.
     print("\n" + "=" * 40)
     
     try:
-        stream = ollama.chat(
-            model=MODEL_PLAN,
-            messages=[
-                {'role': 'system', 'content': system_prompt},
-                {'role': 'user', 'content': user_prompt}
-            ],
-            options={
-                'temperature': 0.1,
-                'repeat_penalty': 1.2,
-                'num_predict': 1024
-            },
-            stream=True
-        )
+        # Aynı gün aynı girdilerle plan zaten üretildiyse modeli çağırma
+        cache_key = plan_cache_key(system_prompt, user_prompt)
+        plan = load_cached_plan(cache_key)
         
-        plan = ""
-        header_marker = "# 🎯"
-        header_found = False
-        
-        for chunk in stream:
-            content = chunk['message']['content']
-            plan += content
-            
-            # Canlı filtreleme
-            if not header_found:
-                if header_marker in plan:
-                    header_found = True
-                    clean_start = plan.find(header_marker)
-                    print(plan[clean_start:], end="", flush=True)
-            else:
-                print(content, end="", flush=True)
+        if plan is not None:
+            logger.info("Plan önbellekten yüklendi")
+            print(plan, end="", flush=True)
+        else:
+            plan = stream_plan(system_prompt, user_prompt)
+            save_cached_plan(cache_key, plan)
         
         print("\n" + "=" * 40)
         
-        # Temizlik
-        if header_marker in plan:
-            plan = plan[plan.find(header_marker):]
-        
         # Kaydet
         ensure_dirs()
         today_str = datetime.now().strftime("%Y-%m-%d")
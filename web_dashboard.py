@@ -3,10 +3,10 @@ HyprContext - Streamlit Web Dashboard
 Aktivite takibi için web arayüzü.
 """
 
-import json
-import re
+import os
 from datetime import datetime
 
+import orjson
 import pandas as pd
 import streamlit as st
 
@@ -15,37 +15,114 @@ from config import HISTORY_FILE
 # === SAYFA AYARLARI ===
 PAGE_TITLE = "HyprContext Dashboard"
 PAGE_ICON = "🚀"
+TIMELINE_PAGE_SIZE = 50   # Zaman çizelgesinde sayfa başına kayıt
 
 st.set_page_config(page_title=PAGE_TITLE, page_icon=PAGE_ICON, layout="wide")
 
 
-@st.cache_data(ttl=30)  # 30 saniye cache
+# === GEÇMİŞ ÖNBELLEĞİ ===
+# Oturum boyunca okunan kayıtlar ve dosyada kalınan konum tutulur;
+# her yenilemede sadece yeni eklenen satırlar okunur.
+HISTORY_STATE_KEY = "_history"
+EMPTY_COLUMNS = ["timestamp", "summary", "tags", "tags_set", "hour"]
+
+
+TAG_PATTERN = r'\[([^\]]+)\]$'     # Özetin sonundaki [Etiket1, Etiket2]
+
+
+def parse_lines(chunk: bytes) -> pd.DataFrame:
+    """JSONL satırlarını en yeni kayıt başta olacak şekilde DataFrame'e çevirir."""
+    records = []
+    for line in reversed(chunk.splitlines()):
+        try:
+            entry = orjson.loads(line)
+            records.append({
+                "timestamp": entry["timestamp"],
+                "summary": entry.get("summary", "")
+            })
+        except orjson.JSONDecodeError:
+            continue
+    
+    if not records:
+        return pd.DataFrame(columns=EMPTY_COLUMNS)
+    
+    # Dönüşümler satır satır değil, sütun üzerinde toplu yapılır
+    df = pd.DataFrame(records)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601")
+    df["tags"] = (
+        df["summary"].str.strip()
+        .str.extract(TAG_PATTERN, expand=False)
+        .fillna("Genel")
+    )
+    # Filtreleme ve saatlik grafik için bir kez hesaplanır
+    df["tags_set"] = df["tags"].str.split(",").map(
+        lambda parts: frozenset(tag.strip() for tag in parts)
+    )
+    df["hour"] = df["timestamp"].dt.hour
+    return df
+
+
 def load_data() -> pd.DataFrame:
-    """JSONL dosyasını okur ve DataFrame'e çevirir."""
+    """JSONL dosyasını okur ve DataFrame'e çevirir.
+    
+    Dosyanın tamamı sadece ilk yüklemede (veya dosya küçüldüyse ya da
+    yerine yenisi konduysa) okunur; sonraki çağrılarda son konumdan
+    itibaren yeni satırlar eklenir.
+    """
     if not HISTORY_FILE.exists():
-        return pd.DataFrame(columns=["timestamp", "summary", "tags"])
-
-    data = []
-    with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-        for line in reversed(lines):
-            try:
-                entry = json.loads(line)
-                summary = entry.get("summary", "")
-                
-                # Tag'leri ayıkla
-                match = re.search(r'\[([^\]]+)\]$', summary.strip())
-                tags = match.group(1) if match else "Genel"
-                
-                data.append({
-                    "timestamp": pd.to_datetime(entry["timestamp"]),
-                    "summary": summary,
-                    "tags": tags
-                })
-            except json.JSONDecodeError:
-                continue
+        st.session_state.pop(HISTORY_STATE_KEY, None)
+        return pd.DataFrame(columns=EMPTY_COLUMNS)
+    
+    state = st.session_state.get(HISTORY_STATE_KEY)
+    
+    with open(HISTORY_FILE, "rb") as f:
+        # Açık dosyanın kimliği: yol aynı kalsa da rotate edilen dosya yeni inode alır
+        stat = os.fstat(f.fileno())
+        file_id = (stat.st_dev, stat.st_ino)
+        
+        # İlk yükleme, dosya kesilmiş veya yerine yenisi konmuş: baştan oku
+        if state is None or file_id != state["file_id"] or stat.st_size < state["offset"]:
+            if state is not None:
+                st.toast("Geçmiş dosyası değişmiş, veriler yeniden yüklendi.")
+            state = {"file_id": file_id, "offset": 0, "df": pd.DataFrame(columns=EMPTY_COLUMNS)}
+        
+        if stat.st_size > state["offset"]:
+            f.seek(state["offset"])
+            chunk = f.read()
+            
+            # Yarım kalmış son satırı bir sonraki okumaya bırak
+            end = chunk.rfind(b"\n") + 1
+            if end:
+                new_df = parse_lines(chunk[:end])
+                if state["df"].empty:
+                    state["df"] = new_df
+                elif not new_df.empty:
+                    state["df"] = pd.concat([new_df, state["df"]], ignore_index=True)
+                state["offset"] += end
+    
+    st.session_state[HISTORY_STATE_KEY] = state
+    return state["df"]
+
+
+def data_version() -> tuple[int, int, int]:
+    """Yüklü verinin sürümü: dosya kimliği (st_dev, st_ino) ve okunan bayt sayısı.
+    
+    Dosya rotate edilip aynı boyuta ulaşsa bile inode değiştiği için
+    sürüm de değişir.
+    """
+    state = st.session_state.get(HISTORY_STATE_KEY)
+    return (*state["file_id"], state["offset"]) if state else (0, 0, 0)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def hourly_counts(_df: pd.DataFrame, version: tuple[int, int, int], search_query: str,
+                  selected_tags: tuple[str, ...]) -> pd.Series:
+    """Saatlik kayıt sayıları.
     
-    return pd.DataFrame(data)
+    DataFrame hash'lenmez (_df); önbellek anahtarı veri sürümü ve
+    filtrelerdir.
+    """
+    return _df.groupby("hour").size()
 
 
 def main():
@@ -83,9 +160,9 @@ def main():
         ]
 
     if selected_tags:
-        mask = filtered_df["tags"].apply(
-            lambda x: any(tag in x for tag in selected_tags)
-        )
+        # Seçili etiketlerden en az biri satırın etiket kümesinde olmalı
+        selected_set = frozenset(selected_tags)
+        mask = ~filtered_df["tags_set"].map(selected_set.isdisjoint).astype(bool)
         filtered_df = filtered_df[mask]
 
     # === İSTATİSTİKLER ===
@@ -110,10 +187,10 @@ def main():
     with col_chart1:
         st.subheader("📊 Saatlik Aktivite Yoğunluğu")
         if not filtered_df.empty:
-            hourly_counts = filtered_df.groupby(
-                filtered_df["timestamp"].dt.hour
-            ).size()
-            st.bar_chart(hourly_counts, color="#00FFAA")
+            counts = hourly_counts(
+                filtered_df, data_version(), search_query, tuple(sorted(selected_tags))
+            )
+            st.bar_chart(counts, color="#00FFAA")
 
     with col_chart2:
         st.subheader("🏷️ En Çok Geçen Konular")
@@ -130,10 +207,18 @@ def main():
     if filtered_df.empty:
         st.info("Filtrelere uygun kayıt bulunamadı.")
     else:
-        for _, row in filtered_df.iterrows():
-            ts = row["timestamp"]
-            summary = row["summary"]
-            tags = row["tags"]
+        # Sadece seçili sayfadaki kayıtlar için widget oluştur
+        page_count = max(1, -(-len(filtered_df) // TIMELINE_PAGE_SIZE))
+        page = st.sidebar.number_input("Sayfa", min_value=1, max_value=page_count, value=1)
+        start = (page - 1) * TIMELINE_PAGE_SIZE
+        page_df = filtered_df.iloc[start:start + TIMELINE_PAGE_SIZE]
+        
+        st.caption(f"Sayfa {page}/{page_count} · {len(filtered_df)} kayıt")
+        
+        for row in page_df.itertuples(index=False):
+            ts = row.timestamp
+            summary = row.summary
+            tags = row.tags
             
             time_display = ts.strftime("%H:%M:%S")
             date_display = ts.strftime("%d %B %Y")
@@ -144,7 +229,7 @@ def main():
 
     # Yenile butonu
     if st.button("🔄 Verileri Yenile"):
-        st.cache_data.clear()
+        st.session_state.pop(HISTORY_STATE_KEY, None)
         st.rerun()
 
 
@@ -3,37 +3,96 @@ HyprContext - Hyprland Pencere Yardımcıları
 Aktif pencere ve workspace bilgilerini toplar.
 """
 
+import os
+import socket
 import subprocess
-import json
 import logging
+from functools import lru_cache
+from pathlib import Path
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# === HYPRLAND IPC ===
+HYPR_TIMEOUT = 5                     # saniye
+HYPR_RECV_SIZE = 64 * 1024
+
+
+@lru_cache(maxsize=1)
+def get_hypr_socket_path() -> Path | None:
+    """Hyprland komut soketinin yolunu bulur (yoksa None)."""
+    signature = os.environ.get("HYPRLAND_INSTANCE_SIGNATURE")
+    if not signature:
+        return None
+    
+    # Yeni sürümler XDG_RUNTIME_DIR, eskiler /tmp altında tutar
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    candidates = [Path("/tmp") / "hypr" / signature / ".socket.sock"]
+    if runtime_dir:
+        candidates.insert(0, Path(runtime_dir) / "hypr" / signature / ".socket.sock")
+    
+    for path in candidates:
+        if path.exists():
+            return path
+    return None
+
+
+def hyprctl(command: str) -> bytes:
+    """Hyprland'e komut gönderir, JSON çıktısını bayt olarak döndürür.
+    
+    Önce doğrudan IPC soketi kullanılır (süreç başlatılmaz); soket yoksa
+    hyprctl komutuna dönülür.
+    
+    Raises:
+        TimeoutError / subprocess.TimeoutExpired: Yanıt zamanında gelmezse
+        subprocess.CalledProcessError: hyprctl hata kodu döndürürse
+        FileNotFoundError: Soket de hyprctl de bulunamazsa
+    """
+    socket_path = get_hypr_socket_path()
+    
+    if socket_path is not None:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(HYPR_TIMEOUT)
+                sock.connect(str(socket_path))
+                sock.sendall(f"j/{command}".encode())
+                
+                # Hyprland yanıtı yazdıktan sonra bağlantıyı kapatır
+                chunks = []
+                while chunk := sock.recv(HYPR_RECV_SIZE):
+                    chunks.append(chunk)
+                return b"".join(chunks)
+        except TimeoutError:
+            raise
+        except OSError as e:
+            logger.debug(f"Hyprland soketi kullanılamadı, hyprctl deneniyor: {e}")
+    
+    result = subprocess.run(
+        ["hyprctl", command, "-j"],
+        capture_output=True,
+        timeout=HYPR_TIMEOUT,
+        check=True
+    )
+    return result.stdout
+
 
 def get_active_window_info() -> str:
     """Aktif pencere bilgisini döndürür."""
     try:
-        result = subprocess.run(
-            ["hyprctl", "activewindow", "-j"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode != 0:
-            logger.warning(f"hyprctl hata kodu: {result.returncode}")
-            return "Aktif pencere bilgisi alınamadı."
-        
-        data = json.loads(result.stdout)
+        data = orjson.loads(hyprctl("activewindow"))
         app_class = data.get('class', 'Bilinmiyor')
         title = data.get('title', 'Bilinmiyor')
         
         return f"{app_class} | {title}"
         
-    except subprocess.TimeoutExpired:
+    except subprocess.CalledProcessError as e:
+        logger.warning(f"hyprctl hata kodu: {e.returncode}")
+        return "Aktif pencere bilgisi alınamadı."
+    except (subprocess.TimeoutExpired, TimeoutError):
         logger.error("hyprctl timeout")
         return "Pencere bilgisi alınamadı (timeout)."
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"JSON parse hatası: {e}")
         return "Pencere bilgisi alınamadı (parse hatası)."
     except FileNotFoundError:
@@ -47,18 +106,7 @@ def get_active_window_info() -> str:
 def get_all_workspaces_info() -> str:
     """Tüm workspace'lerdeki pencerelerin listesini döndürür."""
     try:
-        result = subprocess.run(
-            ["hyprctl", "clients", "-j"],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode != 0:
-            logger.warning(f"hyprctl hata kodu: {result.returncode}")
-            return "Arka plan bilgisi alınamadı."
-        
-        clients = json.loads(result.stdout)
+        clients = orjson.loads(hyprctl("clients"))
         
         if not clients:
             return "Arka plan boş."
@@ -90,10 +138,13 @@ def get_all_workspaces_info() -> str:
         
         return "\n".join(lines)
         
-    except subprocess.TimeoutExpired:
+    except subprocess.CalledProcessError as e:
+        logger.warning(f"hyprctl hata kodu: {e.returncode}")
+        return "Arka plan bilgisi alınamadı."
+    except (subprocess.TimeoutExpired, TimeoutError):
         logger.error("hyprctl timeout")
         return "Arka plan bilgisi alınamadı (timeout)."
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"JSON parse hatası: {e}")
         return "Arka plan bilgisi alınamadı (parse hatası)."
     except FileNotFoundError: